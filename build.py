@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Run every build step on the site, in order
+
+    python3 build.py
+
+  1. build_icon_sprites.py      sidebar icons -> sprite atlases
+  2. build_favorites_catalog.py catalog.json and data-favorite buttons
+  3. build_font_subset.py       WOFF2 subset of gontserrat.ttf
+
+The font subset runs last because it scans the final text of every page
+(including the aria-label the sprite step writes). Each step only redoes work
+for files that changed, so rerunning the whole build is cheap, and each
+script can still be run on its own. The build stops at the first step that
+fails.
+"""
+
+import build_favorites_catalog
+import build_font_subset
+import build_icon_sprites
+
+STEPS = [build_icon_sprites, build_favorites_catalog, build_font_subset]
+
+
+def main():
+    for i, step in enumerate(STEPS, 1):
+        print(f"\n[{i}/{len(STEPS)}] {step.__name__}.py")
+        step.main()
+
+
+if __name__ == '__main__':
+    main()
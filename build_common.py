@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the build_*.py scripts
+
+Each build step keeps its state in .build-cache/<name>.json, tagged with a
+version number: bump a step's version when its output format changes so old
+caches are ignored. Pages are tracked by (mtime, size) so unchanged pages are
+skipped on the next run.
+
+Run the steps through build.py, which runs them in the required order.
+"""
+
+import json
+from pathlib import Path
+
+CACHE_DIR = Path('.build-cache')
+PAGE_GLOBS = ['*.html', 'cat/*.html', 'play/*.html']
+
+
+def site_pages():
+    """Every page of the site, in a stable order"""
+    return sorted(p for pattern in PAGE_GLOBS for p in Path('.').glob(pattern))
+
+
+def page_stamp(path):
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_cache(name, version):
+    """State saved by the last run of a step, or {} if missing or outdated"""
+    try:
+        with open(CACHE_DIR / f'{name}.json', 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != version:
+        return {}
+    return cache
+
+
+def save_cache(name, cache, version):
+    CACHE_DIR.mkdir(exist_ok=True)
+    cache['version'] = version
+    with open(CACHE_DIR / f'{name}.json', 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def print_summary(rows, total):
+    """Print the closing summary: (label, value) rows, then the page total"""
+    print(f"\n{'='*60}")
+    for label, value in rows:
+        print(f"{label + ':':<11}{value}")
+    print(f"{'-'*60}")
+    print(f"{'Total:':<11}{total}")
+    print(f"{'='*60}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Build the compact game catalog used by favorites.html and tag favorite buttons
+
+Writes catalog.json from games.json as an id -> metadata map. To keep it small
+for large catalogs, url and icon are implied by the id where possible:
+
+    {"slope": "Slope", "flappy-bird-origin": ["Flappy Bird Origin", "flappy-bird"]}
+
+  - a plain string is the title; the icon is game_icons/<id>.png
+  - a [title, icon] pair names the icon file (without .png) when it differs
+  - the page is always play/<id>.html
+
+It also rewrites onclick="toggleFavorite('id')" buttons on all pages to
+data-favorite="id", which js/main.js handles with one delegated listener.
+
+Every catalog id must have a play/<id>.html page and every data-favorite id
+must be in the catalog; the script reports any mismatch and exits with 1.
+
+catalog.json is only rewritten when games.json changes, and pages are only
+re-read when they changed since the last run. Step 2 of build.py.
+"""
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+from build_common import load_cache, page_stamp, print_summary, save_cache, site_pages
+
+GAMES_FILE = Path('games.json')
+CATALOG_FILE = Path('catalog.json')
+CACHE_NAME = 'favorites-catalog'
+CATALOG_VERSION = 2
+
+ONCLICK_PATTERN = re.compile(r'''onclick="toggleFavorite\('([^'"]+)'\)"''')
+FAVORITE_PATTERN = re.compile(r'data-favorite="([^"]+)"')
+ICON_PATTERN = re.compile(r'^game_icons/(.+)\.png$')
+
+
+def game_id(game):
+    """Id of a games.json entry: play/<id>.html, or the iframe slug as fallback"""
+    page = Path(game['file'].replace('\\', '/'))
+    if page.parent.name == 'play':
+        return page.stem
+    return game['iframe_url'].rstrip('/').rsplit('/', 1)[-1]
+
+
+def build_catalog(games):
+    catalog = {}
+    for game in games:
+        gid = game_id(game)
+        match = ICON_PATTERN.match(game['icon_url'])
+        icon = match.group(1) if match else game['icon_url']
+        catalog[gid] = game['title'] if icon == gid else [game['title'], icon]
+    return catalog
+
+
+def rewrite_page(filepath):
+    """Replace inline toggleFavorite handlers with data attributes
+
+    Returns (number of handlers replaced, favorite ids used on the page).
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    new_content, count = ONCLICK_PATTERN.subn(r'data-favorite="\1"', content)
+    if count:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+    return count, sorted(set(FAVORITE_PATTERN.findall(new_content)))
+
+
+def missing_icons(catalog):
+    """Catalog ids whose icon file does not exist (cards still render, without art)"""
+    missing = []
+    for gid, entry in catalog.items():
+        icon = gid if isinstance(entry, str) else entry[1]
+        path = Path(icon if '/' in icon else f'game_icons/{icon}.png')
+        if not path.is_file():
+            missing.append(f"'{gid}' -> {path}")
+    return missing
+
+
+def find_mismatches(catalog, page_ids):
+    """Problems that would leave favorites pointing nowhere, as printable lines"""
+    problems = []
+    for gid in catalog:
+        if not Path(f'play/{gid}.html').is_file():
+            problems.append(f"{GAMES_FILE}: '{gid}' has no page play/{gid}.html")
+    for page, ids in sorted(page_ids.items()):
+        for gid in ids:
+            if gid not in catalog:
+                problems.append(f"{page}: data-favorite=\"{gid}\" is not in {CATALOG_FILE}")
+    return problems
+
+
+def main():
+    cache = load_cache(CACHE_NAME, CATALOG_VERSION)
+    games_hash = hashlib.sha1(GAMES_FILE.read_bytes()).hexdigest()
+
+    with open(GAMES_FILE, 'r', encoding='utf-8') as f:
+        catalog = build_catalog(json.load(f))
+
+    if cache.get('games_hash') == games_hash and CATALOG_FILE.exists():
+        print(f"{GAMES_FILE} unchanged, reusing {CATALOG_FILE}")
+    else:
+        with open(CATALOG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(catalog, f, ensure_ascii=False, separators=(',', ':'))
+        print(f"  [OK] {CATALOG_FILE} ({len(catalog)} games, {CATALOG_FILE.stat().st_size} bytes)")
+        cache['games_hash'] = games_hash
+
+    pages = site_pages()
+    page_cache = cache.setdefault('pages', {})
+
+    results = {'updated': 0, 'buttons': 0, 'cached': 0}
+    for filepath in pages:
+        key = filepath.as_posix()
+        entry = page_cache.get(key)
+        if entry and entry['stamp'] == page_stamp(filepath):
+            results['cached'] += 1
+            continue
+        count, ids = rewrite_page(filepath)
+        if count:
+            results['updated'] += 1
+            results['buttons'] += count
+        page_cache[key] = {'stamp': page_stamp(filepath), 'ids': ids}
+
+    save_cache(CACHE_NAME, cache, CATALOG_VERSION)
+
+    print_summary([
+        ('Updated', f"{results['updated']:4d} pages ({results['buttons']} buttons)"),
+        ('Cached', f"{results['cached']:4d}"),
+    ], f"{len(pages):4d}")
+
+    for warning in missing_icons(catalog):
+        print(f"WARNING: missing icon for {warning}")
+
+    page_ids = {p.as_posix(): page_cache[p.as_posix()]['ids'] for p in pages}
+    problems = find_mismatches(catalog, page_ids)
+    if problems:
+        print(f"\n{len(problems)} favorite id mismatches:")
+        for problem in problems:
+            print(f"  [!] {problem}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
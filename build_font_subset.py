@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Subset gontserrat.ttf to the glyphs the site uses and ship it as WOFF2
+
+Scans every page (visible text, attribute values and inline scripts), the
+content: strings in css/custom.css and js/main.js for the characters in use, subsets the font to those glyphs,
+writes gontserrat.<hash>.woff2, points the @font-face rule in css/custom.css
+at it and adds a preload hint to every page.
+
+The subset is cached by the hash of the glyph set, so the font is only rebuilt
+when new characters appear. Step 3 of build.py, after the steps that rewrite
+page text.
+
+Requires fonttools and brotli (pip install fonttools brotli).
+"""
+
+import hashlib
+import re
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+from build_common import load_cache, page_stamp, print_summary, save_cache, site_pages
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    subset = None
+
+SOURCE_FONT = Path('gontserrat.ttf')
+CSS_FILE = Path('css/custom.css')
+CACHE_NAME = 'font-subset'
+EXTRA_SOURCES = [CSS_FILE, Path('js/main.js')]
+
+SUBSET_VERSION = 1
+
+# Printable ASCII is always kept so typed search queries render in the font
+BASE_CHARACTERS = {chr(c) for c in range(0x20, 0x7f)}
+
+# Attributes whose values end up on screen
+TEXT_ATTRIBUTES = {'alt', 'title', 'placeholder', 'value', 'aria-label', 'content'}
+
+FONT_FACE_PATTERN = re.compile(
+    r"(@font-face \{\s*font-family: 'Gontserrat';\s*src: )[^;]*;"
+)
+PRELOAD_PATTERN = re.compile(
+    r'[ \t]*<link rel="preload" href="[^"]*gontserrat\.[0-9a-f]+\.woff2"[^>]*>\n'
+)
+# content: "›" (generated content is rendered in the page font too)
+CSS_CONTENT_PATTERN = re.compile(r'''(?<![-\w])content:\s*(["'])(.*?)\1''')
+CSS_ESCAPE_PATTERN = re.compile(r'\\([0-9a-fA-F]{1,6})\s?|\\(.)')
+# <link rel="stylesheet" href="../css/custom.css">
+STYLESHEET_PATTERN = re.compile(
+    r'^([ \t]*)<link rel="stylesheet" href="((?:\.\./)?)css/custom\.css">',
+    re.MULTILINE
+)
+
+
+class TextCollector(HTMLParser):
+    """Collect every character that can be rendered from a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.characters = set()
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name in TEXT_ATTRIBUTES and value:
+                self.characters.update(value)
+
+    def handle_data(self, data):
+        # Inline scripts are included on purpose: they build titles and labels
+        self.characters.update(data)
+
+
+def page_characters(filepath):
+    collector = TextCollector()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        collector.feed(f.read())
+    collector.close()
+    return collector.characters
+
+
+def css_characters(filepath):
+    """Characters of the content: strings in a stylesheet, with escapes decoded"""
+    characters = set()
+    for _, value in CSS_CONTENT_PATTERN.findall(filepath.read_text(encoding='utf-8')):
+        characters.update(CSS_ESCAPE_PATTERN.sub(
+            lambda m: chr(int(m.group(1), 16)) if m.group(1) else m.group(2), value))
+    return characters
+
+
+def collect_characters(sources, page_cache):
+    """Union of characters over all sources, re-reading only changed files"""
+    characters = set(BASE_CHARACTERS)
+    for filepath in sources:
+        key = filepath.as_posix()
+        entry = page_cache.get(key)
+        if entry is None or entry['stamp'] != page_stamp(filepath):
+            if filepath.suffix == '.html':
+                chars = page_characters(filepath)
+            elif filepath.suffix == '.css':
+                chars = css_characters(filepath)
+            else:
+                chars = set(filepath.read_text(encoding='utf-8'))
+            entry = {'stamp': page_stamp(filepath), 'chars': ''.join(sorted(chars))}
+            page_cache[key] = entry
+        characters.update(entry['chars'])
+    return {c for c in characters if c.isprintable()}
+
+
+def build_subset(characters, output):
+    """Subset the source font to the given characters and save it as WOFF2"""
+    # Keep head.modified from the source so the same glyph set gives the same bytes
+    font = TTFont(SOURCE_FONT, recalcTimestamp=False)
+    cmap = font.getBestCmap()
+    unicodes = sorted(ord(c) for c in characters if ord(c) in cmap)
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    options.desubroutinize = True
+
+    subsetter = subset.Subsetter(options=options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    font.flavor = 'woff2'
+    font.save(output)
+    return len(unicodes)
+
+
+def write_font_face(font_name):
+    """Point the Gontserrat @font-face at the WOFF2 subset, keeping TTF as fallback"""
+    with open(CSS_FILE, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    src = (f"url('../{font_name}') format('woff2'),\n"
+           f"       url('../{SOURCE_FONT.name}') format('truetype');")
+    new_content, count = FONT_FACE_PATTERN.subn(lambda m: m.group(1) + src, content)
+    if count == 0:
+        print(f"WARNING: no Gontserrat @font-face found in {CSS_FILE}")
+    elif new_content != content:
+        with open(CSS_FILE, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+
+
+def add_preload(filepath, font_name):
+    """Insert (or refresh) the font preload hint before custom.css; True if changed"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    new_content = PRELOAD_PATTERN.sub('', content)
+
+    def insert(match):
+        indent, prefix = match.group(1), match.group(2)
+        return (f'{indent}<link rel="preload" href="{prefix}{font_name}" as="font" '
+                f'type="font/woff2" crossorigin>\n{match.group(0)}')
+
+    new_content = STYLESHEET_PATTERN.sub(insert, new_content, count=1)
+    if new_content == content:
+        return False
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(new_content)
+    return True
+
+
+def main():
+    if subset is None:
+        print("fonttools is required: pip install fonttools brotli")
+        sys.exit(1)
+
+    cache = load_cache(CACHE_NAME, SUBSET_VERSION)
+    font_hash = hashlib.sha1(SOURCE_FONT.read_bytes()).hexdigest()
+    pages = site_pages()
+
+    page_cache = cache.setdefault('pages', {})
+    characters = collect_characters(pages + EXTRA_SOURCES, page_cache)
+    glyph_hash = hashlib.sha1(
+        (font_hash + ''.join(sorted(characters))).encode('utf-8')
+    ).hexdigest()
+
+    font_name = f"{SOURCE_FONT.stem}.{glyph_hash[:10]}.woff2"
+    output = Path(font_name)
+
+    if cache.get('glyph_hash') == glyph_hash and output.exists():
+        print(f"Glyph set unchanged, reusing {output}")
+    else:
+        print(f"Subsetting {SOURCE_FONT} to {len(characters)} characters...")
+        for old in Path('.').glob(f"{SOURCE_FONT.stem}.*.woff2"):
+            if old != output:
+                old.unlink()
+        kept = build_subset(characters, output)
+        print(f"  [OK] {output} ({kept} glyphs, {SOURCE_FONT.stat().st_size} -> "
+              f"{output.stat().st_size} bytes)")
+        cache['glyph_hash'] = glyph_hash
+
+    write_font_face(font_name)
+
+    updated = 0
+    for filepath in pages:
+        if add_preload(filepath, font_name):
+            updated += 1
+            chars = page_cache[filepath.as_posix()]['chars']
+            page_cache[filepath.as_posix()] = {'stamp': page_stamp(filepath), 'chars': chars}
+
+    save_cache(CACHE_NAME, cache, SUBSET_VERSION)
+
+    print_summary([
+        ('Characters', f"{len(characters):4d}"),
+        ('Preloads', f"{updated:4d} pages updated"),
+    ], f"{len(pages):4d} pages")
+
+
+if __name__ == '__main__':
+    main()
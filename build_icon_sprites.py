@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Pack the category icons in icon/ into sprite atlases and point the sidebar at them
+
+Every page used to pull ~30 separate icon/imgi_*.webp files for the sidebar.
+This script packs the icon set into one atlas per icon size, writes the
+matching CSS classes into css/custom.css (between marker comments) and rewrites
+the sidebar <img> tags on all pages to <i> elements using those classes
+(not <span>: the collapsed sidebar hides every .sidebar-link span).
+
+Packing is skipped when no icon has changed, and pages are only re-read when
+they changed since the last run. Step 1 of build.py.
+
+Requires Pillow (pip install pillow).
+"""
+
+import hashlib
+import math
+import re
+import sys
+from pathlib import Path
+
+from build_common import load_cache, page_stamp, print_summary, save_cache, site_pages
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ICON_DIR = Path('icon')
+CSS_FILE = Path('css/custom.css')
+CACHE_NAME = 'icon-sprites'
+SPRITE_VERSION = 1
+
+# Maximum number of icons per atlas row
+ATLAS_COLUMNS = 8
+
+CSS_BEGIN = '/* BEGIN generated icon sprites (build_icon_sprites.py) */'
+CSS_END = '/* END generated icon sprites */'
+
+# <img src="../icon/imgi_5_New.webp" alt="New" class="sidebar-icon">
+SIDEBAR_IMG_PATTERN = re.compile(
+    r'<img src="(?P<prefix>(?:\.\./)?)icon/(?P<name>[^"/]+\.webp)" '
+    r'alt="(?P<alt>[^"]*)" class="sidebar-icon">'
+)
+
+
+def icon_class(path):
+    """CSS class for an icon file, e.g. imgi_35_TowerDefense.webp -> icon-towerdefense"""
+    stem = re.sub(r'^imgi_\d+_', '', path.stem)
+    return 'icon-' + re.sub(r'[^a-z0-9]+', '-', stem.lower()).strip('-')
+
+
+def file_hash(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def group_icons_by_size(icons):
+    """Group icon files by pixel size; each group becomes one atlas"""
+    groups = {}
+    for path in icons:
+        with Image.open(path) as im:
+            groups.setdefault(im.size, []).append(path)
+    return groups
+
+
+def pack_atlas(size, paths):
+    """Pack same-sized icons into a grid and return (atlas_path, css_rules)"""
+    width, height = size
+    columns = min(ATLAS_COLUMNS, len(paths))
+    rows = math.ceil(len(paths) / columns)
+
+    atlas = Image.new('RGBA', (width * columns, height * rows), (0, 0, 0, 0))
+    for i, path in enumerate(paths):
+        with Image.open(path) as im:
+            atlas.paste(im.convert('RGBA'), ((i % columns) * width, (i // columns) * height))
+
+    atlas_path = ICON_DIR / f'sprite-{width}x{height}.webp'
+    atlas.save(atlas_path, format='WEBP', lossless=True, quality=100, method=6)
+    version = file_hash(atlas_path)[:8]
+
+    # Percentage offsets keep the sprite correct when media queries resize the icon
+    selectors = ',\n'.join(f'.{icon_class(path)}' for path in paths)
+    rules = [
+        f'{selectors} {{\n'
+        f'  background-image: url(\'../icon/{atlas_path.name}?v={version}\');\n'
+        f'  background-size: {columns * 100}% {rows * 100}%;\n'
+        f'}}'
+    ]
+    for i, path in enumerate(paths):
+        col, row = i % columns, i // columns
+        x = col * 100 / (columns - 1) if columns > 1 else 0
+        y = row * 100 / (rows - 1) if rows > 1 else 0
+        rules.append(f'.{icon_class(path)} {{ background-position: {x:g}% {y:g}%; }}')
+    return atlas_path, rules
+
+
+def write_css(rules):
+    """Replace the generated block at the end of custom.css"""
+    with open(CSS_FILE, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    block = '\n\n'.join([
+        CSS_BEGIN,
+        '.icon-sprite {\n'
+        '  display: inline-block;\n'
+        '  background-repeat: no-repeat;\n'
+        '}',
+        '\n'.join(rules),
+        CSS_END,
+    ])
+
+    pattern = re.compile(re.escape(CSS_BEGIN) + r'.*?' + re.escape(CSS_END), re.DOTALL)
+    if pattern.search(content):
+        content = pattern.sub(lambda _: block, content)
+    else:
+        content = content.rstrip('\n') + '\n\n' + block + '\n'
+
+    with open(CSS_FILE, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def rewrite_page(filepath, classes):
+    """Swap sidebar <img> icons for sprite elements
+
+    Returns (number replaced, icon files referenced that are not in the icon set).
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    replaced, unknown = 0, []
+
+    def replace(match):
+        nonlocal replaced
+        cls = classes.get(match.group('name'))
+        if cls is None:
+            unknown.append(match.group('name'))
+            return match.group(0)
+        replaced += 1
+        return (f'<i class="sidebar-icon icon-sprite {cls}" role="img" '
+                f'aria-label="{match.group("alt")}"></i>')
+
+    new_content = SIDEBAR_IMG_PATTERN.sub(replace, content)
+    if replaced:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+    return replaced, unknown
+
+
+def main():
+    if Image is None:
+        print("Pillow is required: pip install pillow")
+        sys.exit(1)
+
+    cache = load_cache(CACHE_NAME, SPRITE_VERSION)
+    icons = sorted(ICON_DIR.glob('imgi_*.webp')) + sorted(ICON_DIR.glob('Home.webp'))
+    icon_hashes = {path.name: file_hash(path) for path in icons}
+
+    atlases = [ICON_DIR / name for name in cache.get('atlases', [])]
+    icons_changed = (cache.get('icons') != icon_hashes
+                     or not all(path.exists() for path in atlases))
+
+    if icons_changed:
+        print(f"Packing {len(icons)} icons...")
+        rules, atlases = [], []
+        for size, paths in sorted(group_icons_by_size(icons).items()):
+            atlas_path, atlas_rules = pack_atlas(size, paths)
+            atlases.append(atlas_path)
+            rules.extend(atlas_rules)
+            print(f"  [OK] {atlas_path} ({len(paths)} icons, {atlas_path.stat().st_size} bytes)")
+        write_css(rules)
+        cache = {'icons': icon_hashes, 'atlases': [p.name for p in atlases], 'pages': {}}
+    else:
+        print("Icons unchanged, reusing existing atlases")
+
+    classes = {path.name: icon_class(path) for path in icons}
+    pages = site_pages()
+    page_cache = cache.setdefault('pages', {})
+
+    results = {'updated': 0, 'unchanged': 0, 'cached': 0}
+    for filepath in pages:
+        key = filepath.as_posix()
+        if page_cache.get(key) == page_stamp(filepath):
+            results['cached'] += 1
+            continue
+        replaced, unknown = rewrite_page(filepath, classes)
+        results['updated' if replaced else 'unchanged'] += 1
+        for name in unknown:
+            print(f"WARNING: {key} sidebar uses {ICON_DIR / name}, which is not in the icon set")
+        page_cache[key] = page_stamp(filepath)
+
+    save_cache(CACHE_NAME, cache, SPRITE_VERSION)
+
+    print_summary([
+        ('Updated', f"{results['updated']:3d}"),
+        ('Unchanged', f"{results['unchanged']:3d}"),
+        ('Cached', f"{results['cached']:3d}"),
+    ], f"{len(pages):3d}")
+
+
+if __name__ == '__main__':
+    main()
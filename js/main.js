@@ -243,69 +243,94 @@ function performSearch() {
 
 
 // Favorites System
+// Favorite buttons carry data-favorite="<game id>" and are handled by one
+// delegated listener; state lives in a Set so lookups stay O(1).
+let favoriteSet = new Set();
+const favoriteButtons = new Map();
+
 function setupFavorites() {
     // Load favorites from localStorage
-    loadFavorites();
+    favoriteSet = new Set(loadFavorites());
+    
+    // Index buttons by game id once, then paint their initial state
+    document.querySelectorAll('[data-favorite]').forEach(button => {
+        const gameId = button.dataset.favorite;
+        if (!favoriteButtons.has(gameId)) {
+            favoriteButtons.set(gameId, []);
+        }
+        favoriteButtons.get(gameId).push(button);
+        setFavoriteButtonState(button, favoriteSet.has(gameId));
+    });
     
-    // Update favorite buttons
-    updateFavoriteButtons();
+    document.addEventListener('click', function(e) {
+        const button = e.target.closest('[data-favorite]');
+        if (button) {
+            toggleFavorite(button.dataset.favorite);
+        }
+    });
 }
 
 function toggleFavorite(gameId) {
-    let favorites = JSON.parse(localStorage.getItem('favorites') || '[]');
-    
-    if (favorites.includes(gameId)) {
+    if (favoriteSet.has(gameId)) {
         // Remove from favorites
-        favorites = favorites.filter(id => id !== gameId);
+        favoriteSet.delete(gameId);
         showNotification('Removed from favorites', 'warning');
     } else {
         // Add to favorites
-        favorites.push(gameId);
+        favoriteSet.add(gameId);
         showNotification('Added to favorites', 'success');
     }
     
-    localStorage.setItem('favorites', JSON.stringify(favorites));
-    updateFavoriteButtons();
+    saveFavorites();
+    updateFavoriteButtons(gameId);
 }
 
 function loadFavorites() {
     return JSON.parse(localStorage.getItem('favorites') || '[]');
 }
 
-function updateFavoriteButtons() {
-    const favorites = loadFavorites();
-    const favoriteButtons = document.querySelectorAll('[onclick*="toggleFavorite"]');
-    
-    console.log('Current favorites:', favorites); // Debug log
+function saveFavorites() {
+    localStorage.setItem('favorites', JSON.stringify([...favoriteSet]));
+}
+
+function clearFavorites() {
+    favoriteSet.clear();
+    localStorage.removeItem('favorites');
+    favoriteButtons.forEach((buttons, gameId) => updateFavoriteButtons(gameId));
+}
+
+function updateFavoriteButtons(gameId) {
+    // Only the buttons for the toggled game need repainting
+    const isFavorite = favoriteSet.has(gameId);
+    (favoriteButtons.get(gameId) || []).forEach(button => setFavoriteButtonState(button, isFavorite));
+}
+
+function setFavoriteButtonState(button, isFavorite) {
+    const hasIcon = button.querySelector('svg') !== null;
     
-    favoriteButtons.forEach(button => {
-        const gameId = button.getAttribute('onclick').match(/'([^']+)'/)[1];
-        console.log('Checking button for game:', gameId, 'is favorited:', favorites.includes(gameId)); // Debug log
-        
-        if (favorites.includes(gameId)) {
-            button.classList.add('liked');
-            // For game page buttons with SVG, add visual feedback
-            if (button.querySelector('svg')) {
-                button.style.color = 'var(--danger)';
-                button.style.transform = 'scale(1.1)';
-            } else {
-                // For index page buttons with emoji
-                button.innerHTML = '❤️';
-                button.style.color = 'var(--danger)';
-            }
+    if (isFavorite) {
+        button.classList.add('liked');
+        // For game page buttons with SVG, add visual feedback
+        if (hasIcon) {
+            button.style.color = 'var(--danger)';
+            button.style.transform = 'scale(1.1)';
         } else {
-            button.classList.remove('liked');
-            // For game page buttons with SVG, remove visual feedback
-            if (button.querySelector('svg')) {
-                button.style.color = 'var(--gray-400)';
-                button.style.transform = 'scale(1)';
-            } else {
-                // For index page buttons with emoji
-                button.innerHTML = '🤍';
-                button.style.color = 'var(--gray-400)';
-            }
+            // For index page buttons with emoji
+            button.textContent = '❤️';
+            button.style.color = 'var(--danger)';
         }
-    });
+    } else {
+        button.classList.remove('liked');
+        // For game page buttons with SVG, remove visual feedback
+        if (hasIcon) {
+            button.style.color = 'var(--gray-400)';
+            button.style.transform = 'scale(1)';
+        } else {
+            // For index page buttons with emoji
+            button.textContent = '🤍';
+            button.style.color = 'var(--gray-400)';
+        }
+    }
 }
 
 // Smooth Scrolling
@@ -763,6 +788,7 @@ trackEvent('page_view', {
 
 // Export functions for global access
 window.toggleFavorite = toggleFavorite;
+window.clearFavorites = clearFavorites;
 window.toggleFullscreen = toggleFullscreen;
 window.scrollToTop = scrollToTop;
 window.toggleTheme = toggleTheme;
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Local preview server and page-weight audit for the site
+
+    python3 preview_server.py [--port 8000]       serve the site locally
+    python3 preview_server.py audit [--url URL]   audit every page in sitemap.xml
+
+The server behaves like our static host: it serves precompressed .br/.gz
+variants when present (compressing on the fly otherwise), sends ETag and
+Last-Modified headers, answers conditional requests with 304 and sets the
+same Cache-Control max-age.
+
+The audit crawls every page listed in sitemap.xml and reports transferred
+bytes, request counts, the largest inline script and render-blocking resources
+per page. Images and iframes with loading="lazy" are reported separately and
+left out of transfer_bytes and requests, since they are only fetched once
+scrolled into view. Third-party requests are counted, but their bytes are not
+(the audit never leaves the local server). It exits with status 1 when a page exceeds the budgets in
+budgets.json, so it can gate a publish. Budgets are a "default" set plus
+per-path "overrides" matched with shell-style patterns (e.g. "play/*"); see
+the notes in that file for how the limits were chosen.
+
+Brotli support is optional (pip install brotli); gzip is always available.
+"""
+
+import argparse
+import email.utils
+import fnmatch
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+import sys
+import threading
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SITE_ROOT = Path('.').resolve()
+SITEMAP_FILE = Path('sitemap.xml')
+BUDGETS_FILE = Path('budgets.json')
+
+# Matches the max-age our static host sends for every file
+CACHE_CONTROL = 'max-age=600'
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'application/xml',
+    'application/javascript', 'text/javascript', 'application/json',
+    'image/svg+xml', 'font/ttf',
+}
+# Precompressed variants, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('font/ttf', '.ttf')
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('application/javascript', '.js')
+
+CSS_URL_PATTERN = re.compile(r'''url\(\s*['"]?([^'")]+)['"]?\s*\)''')
+CSS_IMPORT_PATTERN = re.compile(r'''@import\s+(?:url\()?\s*['"]?([^'")\s;]+)''')
+FONT_FACE_PATTERN = re.compile(r'@font-face\s*\{[^}]*\}')
+FONT_SRC_PATTERN = re.compile(r'(?<![-\w])src\s*:([^;}]*)')
+
+
+# ---------------------------------------------------------------------------
+# Preview server
+# ---------------------------------------------------------------------------
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Static file handler with content negotiation and conditional requests"""
+
+    server_version = 'PreviewServer/1.0'
+    # (path, encoding) -> (mtime_ns, body, etag); shared by all requests
+    compressed_cache = {}
+    cache_lock = threading.Lock()
+
+    def do_GET(self):
+        self.serve(head_only=False)
+
+    def do_HEAD(self):
+        self.serve(head_only=True)
+
+    def log_message(self, format, *args):
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+    def resolve(self):
+        """Map the request path to a file under the site root, or None"""
+        path = unquote(urlsplit(self.path).path)
+        # Never expose .git/, .build-cache/ or other dotfiles
+        if any(part.startswith('.') for part in path.split('/')):
+            return None
+        target = (SITE_ROOT / path.lstrip('/')).resolve()
+        if SITE_ROOT not in target.parents and target != SITE_ROOT:
+            return None
+        if target.is_dir():
+            target = target / 'index.html'
+        return target if target.is_file() else None
+
+    def accepted_encodings(self):
+        header = self.headers.get('Accept-Encoding', '')
+        return {part.split(';')[0].strip() for part in header.split(',') if part.strip()}
+
+    def select_body(self, target, content_type):
+        """Return (body, encoding, etag) for the best representation of target"""
+        accepted = self.accepted_encodings()
+        for encoding, suffix in ENCODINGS:
+            variant = target.with_name(target.name + suffix)
+            if encoding in accepted and variant.is_file():
+                body = variant.read_bytes()
+                return body, encoding, hashlib.sha1(body).hexdigest()[:16]
+
+        body = target.read_bytes()
+        if content_type.split(';')[0] not in COMPRESSIBLE_TYPES:
+            return body, None, hashlib.sha1(body).hexdigest()[:16]
+
+        encoding = 'br' if brotli and 'br' in accepted else 'gzip' if 'gzip' in accepted else None
+        if encoding is None:
+            return body, None, hashlib.sha1(body).hexdigest()[:16]
+
+        mtime = target.stat().st_mtime_ns
+        key = (target, encoding)
+        with self.cache_lock:
+            cached = self.compressed_cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1], encoding, cached[2]
+
+        if encoding == 'br':
+            compressed = brotli.compress(body)
+        else:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        etag = hashlib.sha1(body).hexdigest()[:16] + '-' + encoding
+        with self.cache_lock:
+            self.compressed_cache[key] = (mtime, compressed, etag)
+        return compressed, encoding, etag
+
+    def not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return f'"{etag}"' in tags or '*' in tags
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return int(last_modified) <= since.timestamp()
+        return False
+
+    def serve(self, head_only):
+        target = self.resolve()
+        if target is None:
+            body = b'404 Not Found'
+            self.send_response(404)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(body)
+            return
+
+        content_type = mimetypes.guess_type(target.name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+
+        body, encoding, etag = self.select_body(target, content_type)
+        last_modified = target.stat().st_mtime
+
+        modified = not self.not_modified(etag, last_modified)
+        if modified:
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+        else:
+            self.send_response(304)
+        self.send_header('ETag', f'"{etag}"')
+        self.send_header('Last-Modified', email.utils.formatdate(last_modified, usegmt=True))
+        self.send_header('Cache-Control', CACHE_CONTROL)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+
+        if modified and not head_only:
+            self.wfile.write(body)
+
+
+def start_server(port, quiet=False):
+    server = ThreadingHTTPServer(('127.0.0.1', port), PreviewHandler)
+    server.quiet = quiet
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Audit
+# ---------------------------------------------------------------------------
+
+class PageParser(HTMLParser):
+    """Collect subresources, inline scripts and render-blocking resources"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.resources = []
+        self.lazy_resources = []
+        self.render_blocking = []
+        self.inline_scripts = []
+        self.in_head = False
+        self.in_inline_script = False
+        self.script_chunks = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'head':
+            self.in_head = True
+        elif tag == 'body':
+            self.in_head = False
+
+        if tag == 'link':
+            rel = (attrs.get('rel') or '').lower().split()
+            href = attrs.get('href')
+            if href and ('stylesheet' in rel or 'preload' in rel):
+                self.resources.append(href)
+                blocking_media = attrs.get('media', 'all') not in ('print',)
+                if 'stylesheet' in rel and blocking_media and 'disabled' not in attrs:
+                    self.render_blocking.append(href)
+        elif tag == 'script':
+            src = attrs.get('src')
+            if src:
+                self.resources.append(src)
+                is_module = attrs.get('type') == 'module'
+                if self.in_head and not ({'async', 'defer'} & attrs.keys()) and not is_module:
+                    self.render_blocking.append(src)
+            elif attrs.get('type', 'text/javascript') in ('text/javascript', 'module',
+                                                          'application/javascript'):
+                self.in_inline_script = True
+                self.script_chunks = []
+        elif tag in ('img', 'iframe') and attrs.get('src'):
+            if (attrs.get('loading') or '').lower() == 'lazy':
+                self.lazy_resources.append(attrs['src'])
+            else:
+                self.resources.append(attrs['src'])
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        elif tag == 'script' and self.in_inline_script:
+            self.in_inline_script = False
+            self.inline_scripts.append(''.join(self.script_chunks))
+
+    def handle_data(self, data):
+        if self.in_inline_script:
+            self.script_chunks.append(data)
+
+
+def fetch(url):
+    """GET url the way a browser would; returns (transferred_bytes, decoded_body)"""
+    accept = 'br, gzip' if brotli else 'gzip'
+    request = urllib.request.Request(url, headers={'Accept-Encoding': accept})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        raw = response.read()
+        encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        return len(raw), gzip.decompress(raw)
+    if encoding == 'br':
+        return len(raw), brotli.decompress(raw)
+    return len(raw), raw
+
+
+def load_budgets():
+    with open(BUDGETS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def budgets_for(budgets, page_path):
+    """Default budgets with the first matching per-path override applied"""
+    limits = dict(budgets.get('default', {}))
+    for pattern, override in budgets.get('overrides', {}).items():
+        if fnmatch.fnmatch(page_path, pattern):
+            limits.update(override)
+            break
+    return limits
+
+
+def sitemap_paths():
+    """Site-relative paths of every page in sitemap.xml"""
+    namespace = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+    tree = ET.parse(SITEMAP_FILE)
+    return [urlsplit(loc.text.strip()).path or '/'
+            for loc in tree.getroot().iterfind('sm:url/sm:loc', namespace)]
+
+
+class Auditor:
+    """Crawl pages on a running server, caching subresource sizes across pages"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.resource_cache = {}
+
+    def resource(self, url):
+        """(transferred_bytes, body) for a same-origin resource, cached per URL"""
+        if url not in self.resource_cache:
+            try:
+                self.resource_cache[url] = fetch(url)
+            except urllib.error.URLError:
+                self.resource_cache[url] = None
+        return self.resource_cache[url]
+
+    def css_references(self, css_url, body):
+        # Every url() counts, even when no element on the page matches its rule
+        text = body.decode('utf-8', errors='replace')
+        refs = []
+        # A browser downloads only the first src of an @font-face it supports;
+        # our fonts list WOFF2 first, which every current browser handles
+        for font_face in FONT_FACE_PATTERN.findall(text):
+            src = FONT_SRC_PATTERN.search(font_face)
+            urls = CSS_URL_PATTERN.findall(src.group(1)) if src else []
+            refs.extend(urls[:1])
+        text = FONT_FACE_PATTERN.sub('', text)
+        refs += CSS_URL_PATTERN.findall(text) + CSS_IMPORT_PATTERN.findall(text)
+        return {urljoin(css_url, ref) for ref in refs if not ref.startswith('data:')}
+
+    def audit_page(self, path):
+        page_url = self.base_url + path
+        transferred, body = fetch(page_url)
+
+        parser = PageParser()
+        parser.feed(body.decode('utf-8', errors='replace'))
+        parser.close()
+
+        pending = [urljoin(page_url, ref) for ref in parser.resources if not ref.startswith('data:')]
+        seen = set()
+        local_requests = third_party = image_bytes = 0
+        missing = []
+        while pending:
+            url = urljoin(pending.pop(), '').split('#')[0]
+            if url in seen:
+                continue
+            seen.add(url)
+            if not url.startswith(self.base_url):
+                third_party += 1
+                continue
+            local_requests += 1
+            result = self.resource(url)
+            if result is None:
+                missing.append(url[len(self.base_url):])
+                continue
+            size, resource_body = result
+            transferred += size
+            if (mimetypes.guess_type(urlsplit(url).path)[0] or '').startswith('image/'):
+                image_bytes += size
+            if urlsplit(url).path.endswith('.css'):
+                pending.extend(self.css_references(url, resource_body) - seen)
+
+        # Below-the-fold images: fetched for the report, not counted as initial load
+        lazy_requests = lazy_bytes = 0
+        for ref in parser.lazy_resources:
+            url = urljoin(page_url, ref).split('#')[0]
+            if ref.startswith('data:') or url in seen:
+                continue
+            seen.add(url)
+            lazy_requests += 1
+            if not url.startswith(self.base_url):
+                continue
+            result = self.resource(url)
+            if result is None:
+                missing.append(url[len(self.base_url):])
+                continue
+            lazy_bytes += result[0]
+
+        inline_sizes = [len(script.encode('utf-8')) for script in parser.inline_scripts]
+        return {
+            'path': path,
+            'transfer_bytes': transferred,
+            'image_bytes': image_bytes,
+            'non_image_bytes': transferred - image_bytes,
+            'requests': 1 + local_requests + third_party,
+            'third_party_requests': third_party,
+            'lazy_requests': lazy_requests,
+            'lazy_image_bytes': lazy_bytes,
+            'inline_script_bytes': max(inline_sizes, default=0),
+            'render_blocking': len(parser.render_blocking),
+            'render_blocking_resources': parser.render_blocking,
+            'missing': missing,
+        }
+
+
+def check_budgets(report, limits):
+    """Names of the budgets the page report exceeds"""
+    return [name for name, limit in limits.items()
+            if name in report and report[name] > limit]
+
+
+def run_audit(base_url, verbose):
+    budgets = load_budgets()
+    auditor = Auditor(base_url)
+    paths = sitemap_paths()
+    print(f"Auditing {len(paths)} pages from {SITEMAP_FILE}...\n")
+
+    failures = []
+    reports = []
+    for i, path in enumerate(paths, 1):
+        try:
+            report = auditor.audit_page(path)
+        except urllib.error.URLError as e:
+            print(f"[{i:3d}] [ERR] {path}: {e}")
+            failures.append((path, ['unreachable']))
+            continue
+        reports.append(report)
+
+        exceeded = check_budgets(report, budgets_for(budgets, path.lstrip('/') or 'index.html'))
+        if exceeded:
+            failures.append((path, exceeded))
+        if exceeded or verbose:
+            marker = '[OVER]' if exceeded else '[OK]  '
+            print(f"[{i:3d}] {marker} {path}")
+            print(f"        {report['transfer_bytes']:,} bytes ({report['image_bytes']:,} images), "
+                  f"{report['requests']} requests "
+                  f"({report['third_party_requests']} third-party, bytes not counted), "
+                  f"largest inline script {report['inline_script_bytes']:,} bytes")
+            print(f"        lazy: {report['lazy_image_bytes']:,} bytes in "
+                  f"{report['lazy_requests']} requests (not in the totals above)")
+            for resource in report['render_blocking_resources']:
+                print(f"        render-blocking: {resource}")
+            for resource in report['missing']:
+                print(f"        missing: {resource}")
+            if exceeded:
+                print(f"        over budget: {', '.join(exceeded)}")
+        elif i % 50 == 0:
+            print(f"[{i:3d}] Processing...")
+
+    print(f"\n{'='*60}")
+    if reports:
+        heaviest = max(reports, key=lambda r: r['transfer_bytes'])
+        largest_script = max(reports, key=lambda r: r['inline_script_bytes'])
+        print(f"Heaviest page:        {heaviest['path']} ({heaviest['transfer_bytes']:,} bytes)")
+        print(f"Largest inline script: {largest_script['path']} "
+              f"({largest_script['inline_script_bytes']:,} bytes)")
+        print(f"Max requests:         {max(r['requests'] for r in reports)}")
+        most_lazy = max(reports, key=lambda r: r['lazy_image_bytes'])
+        print(f"Most lazy images:     {most_lazy['path']} ({most_lazy['lazy_image_bytes']:,} bytes, "
+              f"not counted above)")
+        print(f"{'-'*60}")
+    print(f"Within budget: {len(paths) - len(failures):3d}")
+    print(f"Over budget:   {len(failures):3d}")
+    print(f"{'='*60}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', nargs='?', choices=['serve', 'audit'], default='serve')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='port to serve on (audit uses a free port unless --url is given)')
+    parser.add_argument('--url', help='audit an already running server instead of starting one')
+    parser.add_argument('--verbose', action='store_true', help='report every page, not just failures')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = start_server(args.port)
+        print(f"Serving {SITE_ROOT} at http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.server_close()
+        return
+
+    if args.url:
+        sys.exit(run_audit(args.url, args.verbose))
+
+    server = start_server(0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        status = run_audit(f"http://127.0.0.1:{server.server_address[1]}", args.verbose)
+    finally:
+        server.shutdown()
+        server.server_close()
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()